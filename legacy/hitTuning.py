@@ -1,12 +1,23 @@
 import os
+import mmap
 import sqlite3
 from datetime import datetime
-from typing import List, Optional, Dict, Any, Union, Tuple
-import ROOT as r
-from itertools import product
+from typing import List, Optional, Dict, Any, Union, Tuple, Iterator, Iterable, Callable
+from itertools import product, islice, count, chain
+from collections import deque
+from contextlib import contextmanager
+from functools import lru_cache, partial
+from hashlib import blake2b
+from math import prod
+from operator import attrgetter
+from string import Formatter
+from concurrent.futures import Executor, ProcessPoolExecutor
+from multiprocessing import get_context
 import argparse
 import sys
 import re
+import shlex
+import subprocess
 
 class fclParams:
     """Class to hold FCL (FHiCL) configuration parameters for hit finding."""
@@ -48,6 +59,14 @@ class fclParams:
             return [var, var, var]
         return var
 
+    def _flat_tuple(self) -> Tuple[Union[int, float], ...]:
+        """Return the parameters as one flat tuple, in runs-table column order
+        (three values per per-plane parameter, then MaxMultiHit and Chi2NDF).
+        """
+        return (*self.roiThreshold[:3], *self.minPulseHeight[:3], *self.minPulseSigma[:3],
+                *self.LongMaxHits[:3], *self.LongPulseWidth[:3], *self.PulseHeightCuts[:3],
+                *self.PulseWidthCuts[:3], *self.PulseRatioCuts[:3], self.MaxMultiHit, self.Chi2NDF)
+
     def __str__(self) -> str:
         """Return string representation of FCL parameters."""
         return f"""fclParams:
@@ -62,6 +81,9 @@ class fclParams:
     MaxMultiHit: {self.MaxMultiHit}
     Chi2NDF: {self.Chi2NDF}"""
 
+_INT_RE = re.compile(r'[-+]?\d+')
+_FLOAT_RE = re.compile(r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+
 def _parse_value(val_str: str) -> Union[List, bool, int, float, str]:
     """Parse a single FCL RHS value into a Python type.
     
@@ -86,12 +108,10 @@ def _parse_value(val_str: str) -> Union[List, bool, int, float, str]:
         return s.lower() == 'true'
 
     # Numbers
-    try:
-        if any(ch in s for ch in ('.', 'e', 'E')):
-            return float(s)
+    if _INT_RE.fullmatch(s):
         return int(s)
-    except ValueError:
-        pass
+    if _FLOAT_RE.fullmatch(s):
+        return float(s)
 
     # Quoted string
     if (s.startswith('"') and s.endswith('"')) or (s.startswith("'") and s.endswith("'")):
@@ -112,47 +132,84 @@ def _ensure_list3(v):
         return v + [v[-1]] * (3 - len(v))
     return [v, v, v]
 
+# Compiled key patterns, shared across all FCL files parsed in this process
+_PATTERN_CACHE: Dict[str, 're.Pattern'] = {}
+
+def _get_pattern(key: str) -> 're.Pattern':
+    """Return the compiled `key: <value>` pattern for an FCL key, compiling it once."""
+    pattern = _PATTERN_CACHE.get(key)
+    if pattern is None:
+        # Matches lines like: key: <value> (ignoring trailing comments)
+        pattern = _PATTERN_CACHE.setdefault(key, re.compile(rf"{re.escape(key)}\s*:\s*([^\n#]+)"))
+    return pattern
+
 def get_all_values(key: str, text: str) -> List[Union[List, bool, int, float, str]]:
-    # Matches lines like: key: <value> (ignoring trailing comments)
-    pattern = rf"{re.escape(key)}\s*:\s*([^\n#]+)"
-    matches = re.findall(pattern, text)
+    matches = _get_pattern(key).findall(text)
     return [_parse_value(m.strip()) for m in matches]
 
+# FCL keys read back by parse_fcl_to_params, matched together in a single scan
+_FCL_KEYS = (
+    'HitFinderToolVec.CandidateHitsPlane0.RoiThreshold',
+    'HitFinderToolVec.CandidateHitsPlane1.RoiThreshold',
+    'HitFinderToolVec.CandidateHitsPlane2.RoiThreshold',
+    'HitFilterAlg.MinPulseHeight',
+    'HitFilterAlg.MinPulseSigma',
+    'LongMaxHits',
+    'LongPulseWidth',
+    'PulseHeightCuts',
+    'PulseWidthCuts',
+    'PulseRatioCuts',
+    'MaxMultiHit',
+    'Chi2NDF',
+)
+_FCL_RE = re.compile(rf"({'|'.join(re.escape(k) for k in _FCL_KEYS)})\s*:\s*([^\n#]+)")
+_FCL_RE_BYTES = re.compile(_FCL_RE.pattern.encode())
+
+def _scan_fcl(text: Union[str, bytes, mmap.mmap]) -> Dict[str, Union[List, bool, int, float, str]]:
+    """Find the last value of each tuned FCL key in one pass over the text.
+
+    Later assignments override earlier ones in FHiCL, so only the last match
+    of each key is kept, and only that one is parsed.
+
+    Args:
+        text: FCL file content, either decoded or as raw bytes (e.g. an mmap);
+              with raw bytes only the matched keys and values are decoded
+
+    Returns:
+        Dictionary mapping each key found to its last value
+    """
+    if isinstance(text, str):
+        last = {m.group(1): m.group(2) for m in _FCL_RE.finditer(text)}
+        return {key: _parse_value(raw.strip()) for key, raw in last.items()}
+    last = {m.group(1): m.group(2) for m in _FCL_RE_BYTES.finditer(text)}
+    return {key.decode(): _parse_value(raw.decode().strip()) for key, raw in last.items()}
+
 def parse_fcl_to_params(fcl_path: str) -> 'fclParams':
     """Read a FCL file and reconstruct an fclParams object."""
-    with open(fcl_path, 'r') as f:
-        text = f.read()
-
-    # Per-plane thresholds appear multiple times; take the last occurrence of each
-    rt0 = get_all_values('HitFinderToolVec.CandidateHitsPlane0.RoiThreshold', text)
-    rt1 = get_all_values('HitFinderToolVec.CandidateHitsPlane1.RoiThreshold', text)
-    rt2 = get_all_values('HitFinderToolVec.CandidateHitsPlane2.RoiThreshold', text)
-
-    mph = get_all_values('HitFilterAlg.MinPulseHeight', text)
-    mps = get_all_values('HitFilterAlg.MinPulseSigma', text)
-    lmh = get_all_values('LongMaxHits', text)
-    lpw = get_all_values('LongPulseWidth', text)
-    phc = get_all_values('PulseHeightCuts', text)
-    pwc = get_all_values('PulseWidthCuts', text)
-    prc = get_all_values('PulseRatioCuts', text)
-    mmh = get_all_values('MaxMultiHit', text)
-    chi = get_all_values('Chi2NDF', text)
+    with open(fcl_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            # mmap cannot map an empty file
+            values = _scan_fcl(b'')
+        else:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as text:
+                values = _scan_fcl(text)
 
+    # Per-plane thresholds appear multiple times; _scan_fcl keeps the last occurrence of each
     roiThreshold = _ensure_list3([
-        (rt0[-1] if rt0 else 5.0),
-        (rt1[-1] if rt1 else 5.0),
-        (rt2[-1] if rt2 else 5.0),
+        values.get('HitFinderToolVec.CandidateHitsPlane0.RoiThreshold', 5.0),
+        values.get('HitFinderToolVec.CandidateHitsPlane1.RoiThreshold', 5.0),
+        values.get('HitFinderToolVec.CandidateHitsPlane2.RoiThreshold', 5.0),
     ])
 
-    minPulseHeight = _ensure_list3(mph[-1] if mph else 2.0)
-    minPulseSigma  = _ensure_list3(mps[-1] if mps else 1.0)
-    LongMaxHits    = _ensure_list3(lmh[-1] if lmh else 1)
-    LongPulseWidth = _ensure_list3(lpw[-1] if lpw else 10.0)
-    PulseHeightCuts= _ensure_list3(phc[-1] if phc else 3)
-    PulseWidthCuts = _ensure_list3(pwc[-1] if pwc else 2)
-    PulseRatioCuts = _ensure_list3(prc[-1] if prc else 0.35)
-    MaxMultiHit    = mmh[-1] if mmh else 5
-    Chi2NDF        = chi[-1] if chi else 500.0
+    minPulseHeight = _ensure_list3(values.get('HitFilterAlg.MinPulseHeight', 2.0))
+    minPulseSigma  = _ensure_list3(values.get('HitFilterAlg.MinPulseSigma', 1.0))
+    LongMaxHits    = _ensure_list3(values.get('LongMaxHits', 1))
+    LongPulseWidth = _ensure_list3(values.get('LongPulseWidth', 10.0))
+    PulseHeightCuts= _ensure_list3(values.get('PulseHeightCuts', 3))
+    PulseWidthCuts = _ensure_list3(values.get('PulseWidthCuts', 2))
+    PulseRatioCuts = _ensure_list3(values.get('PulseRatioCuts', 0.35))
+    MaxMultiHit    = values.get('MaxMultiHit', 5)
+    Chi2NDF        = values.get('Chi2NDF', 500.0)
 
     return fclParams(
         roiThreshold=roiThreshold,
@@ -167,23 +224,87 @@ def parse_fcl_to_params(fcl_path: str) -> 'fclParams':
         Chi2NDF=Chi2NDF,
     )
 
+# Per-plane parameter columns of the runs table, in fclParams order
+_PARAM_COLUMNS = tuple(
+    f'{name}_{plane}'
+    for name in ('roiThreshold', 'minPulseHeight', 'minPulseSigma', 'LongMaxHits', 'LongPulseWidth',
+                 'PulseHeightCuts', 'PulseWidthCuts', 'PulseRatioCuts')
+    for plane in range(3)
+) + ('MaxMultiHit', 'Chi2NDF')
+
+# Result columns filled by update_results, in galleryMC output order
+_RESULT_COLUMNS = tuple(
+    f'ratio_{particle}{plane}'
+    for particle in ('total', 'ele', 'gamma', 'mu', 'p', 'pi')
+    for plane in ('', '0', '1', '2')
+)
+
+# Columns written by add_run; result columns start at their -1 default
+_RUN_COLUMNS = ('jobNum', 'timestamp', 'fcl_filename', 'output_filename', 'hist_filename',
+                *_PARAM_COLUMNS, 'notes')
+
+_INSERT_RUN_SQL = f"INSERT INTO runs ({', '.join(_RUN_COLUMNS)}) VALUES ({', '.join(['?'] * len(_RUN_COLUMNS))})"
+
+# For databases created before the result columns had a default: the -1
+# "no result yet" sentinel is bound explicitly
+_INSERT_RUN_UNSET_RESULTS_SQL = (f"INSERT INTO runs ({', '.join(_RUN_COLUMNS + _RESULT_COLUMNS)}) "
+                                 f"VALUES ({', '.join(['?'] * (len(_RUN_COLUMNS) + len(_RESULT_COLUMNS)))})")
+_UNSET_RESULTS = (-1,) * len(_RESULT_COLUMNS)
+
+@lru_cache(maxsize=None)
+def _update_run_sql(columns: Tuple[str, ...]) -> str:
+    """Build (once per column set) the UPDATE statement for the given columns of a run."""
+    return f"UPDATE runs SET {', '.join(f'{c} = ?' for c in columns)} WHERE id = ?"
+
 class HitTuningDB:
-    """Database manager for hit tuning parameter scans and results."""
+    """Database manager for hit tuning parameter scans and results.
+
+    Instances are not thread-safe: they share one connection and one cursor.
+    """
+
+    # Columns that search_runs accepts as filters
+    _SEARCHABLE = frozenset(('id', *_RUN_COLUMNS, *_RESULT_COLUMNS))
     
     def __init__(self, db_path: str = "hitTuning.db") -> None:
         """Initialize database connection and create tables if needed.
-        
+
+        The connection uses WAL journaling with synchronous=NORMAL, so each
+        commit costs a single fsync; WAL needs the database on a local
+        filesystem (not NFS or dCache mounts). `close` turns the file back
+        into a plain rollback-journal DB.
+
+        The connection is in autocommit mode: each statement commits on its
+        own unless it runs inside a `transaction` block.
+
         Args:
             db_path: Path to SQLite database file
         """
         self.db_path: str = db_path
-        self.conn: sqlite3.Connection = sqlite3.connect(db_path)
+        self.conn: sqlite3.Connection = sqlite3.connect(db_path, isolation_level=None)
+        self.conn.executescript('''
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            PRAGMA temp_store = MEMORY;
+            PRAGMA mmap_size = 268435456;
+            PRAGMA cache_size = -65536;
+        ''')
+        # One cursor shared by all methods; every query is fully fetched before returning
+        self._cursor: sqlite3.Cursor = self.conn.cursor()
         self.create_tables()
+
+        # CREATE TABLE IF NOT EXISTS leaves older files as they are: check
+        # whether their result columns default to -1 or it must be inserted
+        self._cursor.execute('PRAGMA table_info(runs)')
+        defaults = {row[1]: row[4] for row in self._cursor.fetchall()}
+        self._bind_unset_results: bool = any(defaults.get(c) is None for c in _RESULT_COLUMNS)
     
     def create_tables(self) -> None:
         """Create database tables for storing run parameters and results."""
-        cursor = self.conn.cursor()
-        
+        with self.transaction():
+            self._create_tables(self._cursor)
+
+    def _create_tables(self, cursor: sqlite3.Cursor) -> None:
+        """Issue the CREATE TABLE/INDEX statements on `cursor`."""
         # Create table for tracking runs
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS runs (
@@ -220,34 +341,39 @@ class HitTuningDB:
                 MaxMultiHit INTEGER,
                 Chi2NDF REAL,
                 notes TEXT,
-                ratio_total REAL,
-                ratio_total0 REAL,
-                ratio_total1 REAL,
-                ratio_total2 REAL,
-                ratio_ele REAL,
-                ratio_ele0 REAL,
-                ratio_ele1 REAL,
-                ratio_ele2 REAL,
-                ratio_gamma REAL,
-                ratio_gamma0 REAL,
-                ratio_gamma1 REAL,
-                ratio_gamma2 REAL,
-                ratio_mu REAL,
-                ratio_mu0 REAL,
-                ratio_mu1 REAL,
-                ratio_mu2 REAL,
-                ratio_p REAL,
-                ratio_p0 REAL,
-                ratio_p1 REAL,
-                ratio_p2 REAL,
-                ratio_pi REAL,
-                ratio_pi0 REAL,
-                ratio_pi1 REAL,
-                ratio_pi2 REAL
+                ratio_total REAL DEFAULT -1,
+                ratio_total0 REAL DEFAULT -1,
+                ratio_total1 REAL DEFAULT -1,
+                ratio_total2 REAL DEFAULT -1,
+                ratio_ele REAL DEFAULT -1,
+                ratio_ele0 REAL DEFAULT -1,
+                ratio_ele1 REAL DEFAULT -1,
+                ratio_ele2 REAL DEFAULT -1,
+                ratio_gamma REAL DEFAULT -1,
+                ratio_gamma0 REAL DEFAULT -1,
+                ratio_gamma1 REAL DEFAULT -1,
+                ratio_gamma2 REAL DEFAULT -1,
+                ratio_mu REAL DEFAULT -1,
+                ratio_mu0 REAL DEFAULT -1,
+                ratio_mu1 REAL DEFAULT -1,
+                ratio_mu2 REAL DEFAULT -1,
+                ratio_p REAL DEFAULT -1,
+                ratio_p0 REAL DEFAULT -1,
+                ratio_p1 REAL DEFAULT -1,
+                ratio_p2 REAL DEFAULT -1,
+                ratio_pi REAL DEFAULT -1,
+                ratio_pi0 REAL DEFAULT -1,
+                ratio_pi1 REAL DEFAULT -1,
+                ratio_pi2 REAL DEFAULT -1
             )
         ''')
-        
-        self.conn.commit()
+
+        # Indexes on the columns most often used to look runs up
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_runs_timestamp ON runs (timestamp DESC)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_runs_jobNum ON runs (jobNum)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_runs_roiThreshold ON runs (roiThreshold_0, roiThreshold_1, roiThreshold_2)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_runs_MaxMultiHit ON runs (MaxMultiHit)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_runs_Chi2NDF ON runs (Chi2NDF)')
     
     def add_run(self, params: fclParams, jobNum: int, fcl_filename: str, 
                 output_filename: Optional[str] = None, hist_filename: Optional[str] = None, 
@@ -265,46 +391,98 @@ class HitTuningDB:
         Returns:
             Database ID of the inserted run
         """
-        cursor = self.conn.cursor()
+        return self.add_runs([(params, jobNum, fcl_filename, output_filename, hist_filename, notes)])[0]
+    
+    def add_runs(self, runs: List[Tuple]) -> List[int]:
+        """Add several runs to the database in a single transaction.
+        
+        Args:
+            runs: List of tuples with the arguments of `add_run`, i.e.
+                  (params, jobNum, fcl_filename[, output_filename[, hist_filename[, notes]]])
+            
+        Returns:
+            Database IDs of the inserted runs, in input order
+        """
+        if not runs:
+            return []
+
+        cursor = self._cursor
         
         timestamp = datetime.now().isoformat()
         
-        cursor.execute('''
-            INSERT INTO runs (
-                jobNum, timestamp, fcl_filename, output_filename, hist_filename,
-                roiThreshold_0, roiThreshold_1, roiThreshold_2,
-                minPulseHeight_0, minPulseHeight_1, minPulseHeight_2,
-                minPulseSigma_0, minPulseSigma_1, minPulseSigma_2,
-                LongMaxHits_0, LongMaxHits_1, LongMaxHits_2,
-                LongPulseWidth_0, LongPulseWidth_1, LongPulseWidth_2,
-                PulseHeightCuts_0, PulseHeightCuts_1, PulseHeightCuts_2,
-                PulseWidthCuts_0, PulseWidthCuts_1, PulseWidthCuts_2,
-                PulseRatioCuts_0, PulseRatioCuts_1, PulseRatioCuts_2,
-                MaxMultiHit, Chi2NDF, notes, 
-                ratio_total, ratio_total0, ratio_total1, ratio_total2,
-                ratio_ele, ratio_ele0, ratio_ele1, ratio_ele2, 
-                ratio_gamma, ratio_gamma0, ratio_gamma1, ratio_gamma2, 
-                ratio_mu, ratio_mu0, ratio_mu1, ratio_mu2, 
-                ratio_p, ratio_p0, ratio_p1, ratio_p2, 
-                ratio_pi, ratio_pi0, ratio_pi1, ratio_pi2
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?,
-            ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            jobNum, timestamp, fcl_filename, output_filename, hist_filename,
-            params.roiThreshold[0], params.roiThreshold[1], params.roiThreshold[2],
-            params.minPulseHeight[0], params.minPulseHeight[1], params.minPulseHeight[2],
-            params.minPulseSigma[0], params.minPulseSigma[1], params.minPulseSigma[2],
-            params.LongMaxHits[0], params.LongMaxHits[1], params.LongMaxHits[2],
-            params.LongPulseWidth[0], params.LongPulseWidth[1], params.LongPulseWidth[2],
-            params.PulseHeightCuts[0], params.PulseHeightCuts[1], params.PulseHeightCuts[2],
-            params.PulseWidthCuts[0], params.PulseWidthCuts[1], params.PulseWidthCuts[2],
-            params.PulseRatioCuts[0], params.PulseRatioCuts[1], params.PulseRatioCuts[2],
-            params.MaxMultiHit, params.Chi2NDF, notes, -1, -1, -1, -1, -1, -1, -1, -1, -1, 
-            -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1
-        ))
+        rows = [self._run_row(timestamp, *run) for run in runs]
+        if self._bind_unset_results:
+            sql = _INSERT_RUN_UNSET_RESULTS_SQL
+            rows = [row + _UNSET_RESULTS for row in rows]
+        else:
+            sql = _INSERT_RUN_SQL
         
-        self.conn.commit()
-        return cursor.lastrowid
+        with self.transaction():
+            cursor.executemany(sql, rows)
+
+            # AUTOINCREMENT ids of a single multi-row insert are contiguous
+            cursor.execute('SELECT last_insert_rowid()')
+            last_id = cursor.fetchone()[0]
+        
+        return list(range(last_id - len(runs) + 1, last_id + 1))
+    
+    def add_grid(self, params_iter: Iterable[fclParams], jobNum_start: int = 0, 
+                 fcl_filename_fmt: str = "hitTuning_{}.fcl", chunk: int = 1000) -> List[int]:
+        """Add one run per parameter set of a grid, in a single transaction.
+        
+        The parameter sets are consumed lazily and inserted `chunk` rows at a
+        time, so the grid (e.g. an `itertools.product` scan) never needs to be
+        materialized.
+        
+        Args:
+            params_iter: Iterable of FCL parameters, one per run
+            jobNum_start: Job number of the first run; following runs count up from it
+            fcl_filename_fmt: Format string giving the FCL filename from the job number
+            chunk: Number of rows per executemany call
+            
+        Returns:
+            Database IDs of the inserted runs, in input order
+        """
+        run_ids = []
+        jobNums = count(jobNum_start)
+        params_iter = iter(params_iter)
+        with self.transaction():
+            while True:
+                runs = [(params, jobNum, fcl_filename_fmt.format(jobNum)) 
+                        for params, jobNum in zip(islice(params_iter, chunk), jobNums)]
+                if not runs:
+                    break
+                run_ids.extend(self.add_runs(runs))
+        return run_ids
+    
+    @staticmethod
+    def _run_row(timestamp: str, params: fclParams, jobNum: int, fcl_filename: str, 
+                 output_filename: Optional[str] = None, hist_filename: Optional[str] = None, 
+                 notes: Optional[str] = None) -> Tuple:
+        """Build the INSERT bind values for one run."""
+        return (jobNum, timestamp, fcl_filename, output_filename, hist_filename,
+                *params._flat_tuple(), notes)
+    
+    @contextmanager
+    def transaction(self) -> Iterator['HitTuningDB']:
+        """Run the writes issued inside the block (e.g. a whole parameter grid)
+        as one transaction, committed at the end of the block and rolled back
+        if it raises. Nested blocks join the enclosing transaction.
+        """
+        if self.conn.in_transaction:
+            yield self
+            return
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield self
+        except BaseException:
+            self.conn.execute('ROLLBACK')
+            raise
+        else:
+            self.conn.execute('COMMIT')
+
+    # Former name of `transaction`
+    batch = transaction
     
     def get_run(self, run_id: int) -> Optional[Tuple]:
         """Retrieve a single run by ID.
@@ -315,7 +493,7 @@ class HitTuningDB:
         Returns:
             Tuple containing run data, or None if not found
         """
-        cursor = self.conn.cursor()
+        cursor = self._cursor
         cursor.execute('SELECT * FROM runs WHERE id = ?', (run_id,))
         return cursor.fetchone()
     
@@ -325,31 +503,77 @@ class HitTuningDB:
         Returns:
             List of tuples containing run data
         """
-        cursor = self.conn.cursor()
+        cursor = self._cursor
         cursor.execute('SELECT * FROM runs ORDER BY timestamp DESC')
         return cursor.fetchall()
     
+    def count_runs(self) -> int:
+        """Count the runs in database without fetching them.
+        
+        Returns:
+            Number of runs
+        """
+        cursor = self._cursor
+        cursor.execute('SELECT COUNT(*) FROM runs')
+        return cursor.fetchone()[0]
+    
     def search_runs(self, **kwargs: Any) -> List[Tuple]:
         """Search runs by parameter values.
         
         Args:
-            **kwargs: Key-value pairs to filter runs
+            **kwargs: Key-value pairs to filter runs; keys must be column names
             
         Returns:
             List of tuples containing matching run data
+
+        Raises:
+            ValueError: If a key is not a column of the runs table
         """
-        cursor = self.conn.cursor()
-        
-        query = 'SELECT * FROM runs WHERE 1=1'
-        params = []
+        unknown = kwargs.keys() - self._SEARCHABLE
+        if unknown:
+            raise ValueError(f"Cannot search runs by unknown column(s): {', '.join(sorted(unknown))}")
+
+        cursor = self._cursor
         
-        for key, value in kwargs.items():
-            query += f' AND {key} = ?'
-            params.append(value)
+        # Sorted keys give the same SQL text for any argument order,
+        # so sqlite3's statement cache can reuse the compiled query
+        keys = sorted(kwargs)
+        query = 'SELECT * FROM runs WHERE 1=1' + ''.join(f' AND {key} = ?' for key in keys)
         
-        cursor.execute(query, params)
+        cursor.execute(query, [kwargs[key] for key in keys])
         return cursor.fetchall()
     
+    def finalize_run(self, run_id: int, output_filename: Optional[str] = None, 
+                     hist_filename: Optional[str] = None, 
+                     results: Optional[List[List[float]]] = None) -> None:
+        """Record the outputs of a run with a single UPDATE.
+        
+        Only the arguments that are given are written; the others keep their
+        current value in the database.
+        
+        Args:
+            run_id: Database ID of the run
+            output_filename: Path to output ROOT file (optional)
+            hist_filename: Path to histogram ROOT file (optional)
+            results: Ratio results from galleryMC (optional), see `update_results`
+        """
+        columns = ()
+        values = []
+        if output_filename is not None:
+            columns += ('output_filename',)
+            values.append(output_filename)
+        if hist_filename is not None:
+            columns += ('hist_filename',)
+            values.append(hist_filename)
+        if results is not None:
+            columns += _RESULT_COLUMNS
+            values.extend(float(results[i][j]) for i in range(6) for j in range(4))
+        if not columns:
+            return
+
+        cursor = self._cursor
+        cursor.execute(_update_run_sql(columns), (*values, run_id))
+    
     def update_output_filename(self, run_id: int, output_filename: str) -> None:
         """Update the output filename for a run.
         
@@ -357,10 +581,7 @@ class HitTuningDB:
             run_id: Database ID of the run
             output_filename: Path to output ROOT file
         """
-        cursor = self.conn.cursor()
-        cursor.execute('UPDATE runs SET output_filename = ? WHERE id = ?', 
-                      (output_filename, run_id))
-        self.conn.commit()
+        self.finalize_run(run_id, output_filename=output_filename)
     
     def update_hist_filename(self, run_id: int, hist_filename: str) -> None:
         """Update the histogram filename for a run.
@@ -369,10 +590,7 @@ class HitTuningDB:
             run_id: Database ID of the run
             hist_filename: Path to histogram ROOT file
         """
-        cursor = self.conn.cursor()
-        cursor.execute('UPDATE runs SET hist_filename = ? WHERE id = ?', 
-                      (hist_filename, run_id))
-        self.conn.commit()
+        self.finalize_run(run_id, hist_filename=hist_filename)
     
     def update_results(self, run_id: int, results: List[List[float]]) -> None:
         """Update the run with results from galleryMC.
@@ -383,59 +601,120 @@ class HitTuningDB:
                     Format: [[ratio_total, ...], [ratio_ele, ...], [ratio_gamma, ...], 
                             [ratio_mu, ...], [ratio_p, ...], [ratio_pi, ...]]
         """
-        cursor = self.conn.cursor()
-        cursor.execute('''UPDATE runs SET 
-                            ratio_total = ?, 
-                            ratio_total0 = ?,
-                            ratio_total1 = ?,
-                            ratio_total2 = ?,
-                            ratio_ele = ?, 
-                            ratio_ele0 = ?,
-                            ratio_ele1 = ?,
-                            ratio_ele2 = ?,
-                            ratio_gamma = ?,
-                            ratio_gamma0 = ?,
-                            ratio_gamma1 = ?,
-                            ratio_gamma2 = ?, 
-                            ratio_mu = ?, 
-                            ratio_mu0 = ?,
-                            ratio_mu1 = ?,
-                            ratio_mu2 = ?,
-                            ratio_p = ?, 
-                            ratio_p0 = ?,
-                            ratio_p1 = ?,
-                            ratio_p2 = ?,
-                            ratio_pi = ?, 
-                            ratio_pi0 = ?,
-                            ratio_pi1 = ?,
-                            ratio_pi2 = ?
-                            WHERE id = ?''', 
-                      (float(results[0][0]), float(results[0][1]), float(results[0][2]), float(results[0][3]),
-                        float(results[1][0]), float(results[1][1]), float(results[1][2]), float(results[1][3]),
-                        float(results[2][0]), float(results[2][1]), float(results[2][2]), float(results[2][3]),
-                        float(results[3][0]), float(results[3][1]), float(results[3][2]), float(results[3][3]),
-                        float(results[4][0]), float(results[4][1]), float(results[4][2]), float(results[4][3]),
-                        float(results[5][0]), float(results[5][1]), float(results[5][2]), float(results[5][3]),
-                        run_id))
-        self.conn.commit()
+        self.finalize_run(run_id, results=results)
     
     def close(self) -> None:
-        """Close the database connection."""
+        """Close the database connection.
+
+        The file is switched back to a rollback journal first: WAL mode is
+        stored in the database header, and DBs shipped off the worker node
+        (e.g. to dCache) must not need WAL to be read or merged.
+        """
+        try:
+            self.conn.execute('PRAGMA journal_mode = DELETE')
+        except sqlite3.OperationalError:
+            pass  # another connection still has the DB open; its close switches it
         self.conn.close()
 
-def generateFCLMC(params: fclParams, outputFile: str = "hitTuningMC.fcl", verbose: bool = False) -> None:
-    """Generate FCL configuration file for Monte Carlo data processing.
-    
+_TPCS = ('EE', 'EW', 'WE', 'WW')
+
+# Hit-finder settings of one TPC producer; rendered once per entry of _TPCS
+_TPC_TEMPLATE = '''\
+{prefix}.gaushit2dTPC{tpc}.HitFinderToolVec.CandidateHitsPlane0.RoiThreshold:      {roiThreshold[0]}
+{prefix}.gaushit2dTPC{tpc}.HitFinderToolVec.CandidateHitsPlane1.RoiThreshold:      {roiThreshold[1]}
+{prefix}.gaushit2dTPC{tpc}.HitFinderToolVec.CandidateHitsPlane2.RoiThreshold:      {roiThreshold[2]}
+{prefix}.gaushit2dTPC{tpc}.HitFilterAlg.MinPulseHeight:                            {minPulseHeight}
+{prefix}.gaushit2dTPC{tpc}.HitFilterAlg.MinPulseSigma:                             {minPulseSigma}
+{prefix}.gaushit2dTPC{tpc}.LongMaxHits:                                            {LongMaxHits}
+{prefix}.gaushit2dTPC{tpc}.LongPulseWidth:                                         {LongPulseWidth}
+{prefix}.gaushit2dTPC{tpc}.PulseHeightCuts:                                        {PulseHeightCuts}
+{prefix}.gaushit2dTPC{tpc}.PulseWidthCuts:                                         {PulseWidthCuts}
+{prefix}.gaushit2dTPC{tpc}.PulseRatioCuts:                                         {PulseRatioCuts}
+{prefix}.gaushit2dTPC{tpc}.MaxMultiHit:                                            {MaxMultiHit}
+{prefix}.gaushit2dTPC{tpc}.Chi2NDF:                                                {Chi2NDF}'''
+
+def _param_getter(field: str) -> Callable[[fclParams], Any]:
+    """Return a getter for a template field such as `Chi2NDF` or `roiThreshold[0]`."""
+    name, _, index = field.partition('[')
+    get = attrgetter(name)
+    if not index:
+        return get
+    i = int(index.rstrip(']'))
+    return lambda params: get(params)[i]
+
+@lru_cache(maxsize=None)
+def _tpc_emitter(prefix: str) -> Tuple[Tuple[Callable[[fclParams], Any], ...], Tuple[Tuple[str, int], ...], str]:
+    """Compile (once per prefix) the four TPC blocks into an emitter.
+
+    The template is parsed a single time: `prefix` and `tpc` are folded into
+    the literal text, and every distinct parameter field becomes one getter,
+    shared by all the places (and TPCs) it appears in.
+
+    Returns:
+        The getters of the distinct fields, pairs of (literal text, index of
+        the getter whose value follows it), and the trailing literal text
+    """
+    getters = []
+    fields = {}
+    parts = []
+    pending = ''
+    for itpc, tpc in enumerate(_TPCS):
+        if itpc:
+            pending += '\n\n'
+        for literal, field, _, _ in Formatter().parse(_TPC_TEMPLATE):
+            pending += literal
+            if field is None:
+                continue
+            if field == 'prefix':
+                pending += prefix
+            elif field == 'tpc':
+                pending += tpc
+            else:
+                if field not in fields:
+                    fields[field] = len(getters)
+                    getters.append(_param_getter(field))
+                parts.append((pending, fields[field]))
+                pending = ''
+    return tuple(getters), tuple(parts), pending
+
+def _tpc_fragments(params: fclParams, prefix: str) -> Iterator[str]:
+    """Render the hit-finder settings of all four TPC producers piecewise.
+
     Args:
         params: FCL parameters to use in configuration
+        prefix: FCL table holding the producers (e.g. 'physics.producers')
+
+    Yields:
+        Consecutive pieces of the FCL text for all TPCs, one block per TPC
+        separated by a blank line
+    """
+    getters, parts, tail = _tpc_emitter(prefix)
+    # Each parameter is looked up and formatted once, then reused for every TPC
+    values = [str(get(params)) for get in getters]
+    for literal, i in parts:
+        yield literal
+        yield values[i]
+    yield tail
+
+def _write_fcl(outputFile: str, header: str, prefix: str, params: fclParams, footer: str) -> None:
+    """Write a full FCL: static header, the four TPC blocks, static footer.
+
+    Args:
         outputFile: Path to output FCL file
-        verbose: Whether to print parameters to console
+        header: Static FCL text preceding the TPC blocks
+        prefix: FCL table holding the producers (e.g. 'physics.producers')
+        params: FCL parameters to use in configuration
+        footer: Static FCL text following the TPC blocks
     """
-    if verbose:
-        print("Generating new FHICL file for MC with the following parameters:")
-        print(params.__str__())
+    # Fragments go straight into the 64 KiB buffer: no intermediate copy of
+    # the whole file is built, and it still reaches disk in a single write
+    with open(outputFile, 'w', buffering=65536) as f:
+        f.write(header)
+        f.writelines(_tpc_fragments(params, prefix))
+        f.write(footer)
 
-    fclStr=f'''
+# Static parts of the MC FCL, written around the per-TPC hit-finder blocks
+_FCL_MC_HEADER = '''
 
 # This runs larcv as part of stage 1 processing for MC
 #include "wirechannelroiconverters_sbn.fcl"
@@ -445,7 +724,7 @@ def generateFCLMC(params: fclParams, outputFile: str = "hitTuningMC.fcl", verbos
 process_name: MCstage1p2
 
 ## Add the MC module to the list of producers
-icarus_stage1_producers: {{
+icarus_stage1_producers: {
   channel2wire:                   @local::channelroitowire
 
   gaushit2dTPCWW:                 @local::gausshit_sbn
@@ -461,60 +740,12 @@ icarus_stage1_producers: {{
   mcreco:                         @local::standard_mcreco
   mcassociationsGausCryoE:        @local::standard_mcparticlehitmatching
   mcassociationsGausCryoW:        @local::standard_mcparticlehitmatching
-}}
+}
 
 # Lower thresholds for tighter filter width
-icarus_stage1_producers.gaushit2dTPCEE.HitFinderToolVec.CandidateHitsPlane0.RoiThreshold:      {params.roiThreshold[0]}
-icarus_stage1_producers.gaushit2dTPCEE.HitFinderToolVec.CandidateHitsPlane1.RoiThreshold:      {params.roiThreshold[1]}
-icarus_stage1_producers.gaushit2dTPCEE.HitFinderToolVec.CandidateHitsPlane2.RoiThreshold:      {params.roiThreshold[2]}
-icarus_stage1_producers.gaushit2dTPCEE.HitFilterAlg.MinPulseHeight:                            {params.minPulseHeight}
-icarus_stage1_producers.gaushit2dTPCEE.HitFilterAlg.MinPulseSigma:                             {params.minPulseSigma}
-icarus_stage1_producers.gaushit2dTPCEE.LongMaxHits:                                            {params.LongMaxHits}
-icarus_stage1_producers.gaushit2dTPCEE.LongPulseWidth:                                         {params.LongPulseWidth}
-icarus_stage1_producers.gaushit2dTPCEE.PulseHeightCuts:                                        {params.PulseHeightCuts}
-icarus_stage1_producers.gaushit2dTPCEE.PulseWidthCuts:                                         {params.PulseWidthCuts}
-icarus_stage1_producers.gaushit2dTPCEE.PulseRatioCuts:                                         {params.PulseRatioCuts}
-icarus_stage1_producers.gaushit2dTPCEE.MaxMultiHit:                                            {params.MaxMultiHit}
-icarus_stage1_producers.gaushit2dTPCEE.Chi2NDF:                                                {params.Chi2NDF}
-
-icarus_stage1_producers.gaushit2dTPCEW.HitFinderToolVec.CandidateHitsPlane0.RoiThreshold:      {params.roiThreshold[0]}
-icarus_stage1_producers.gaushit2dTPCEW.HitFinderToolVec.CandidateHitsPlane1.RoiThreshold:      {params.roiThreshold[1]}
-icarus_stage1_producers.gaushit2dTPCEW.HitFinderToolVec.CandidateHitsPlane2.RoiThreshold:      {params.roiThreshold[2]}
-icarus_stage1_producers.gaushit2dTPCEW.HitFilterAlg.MinPulseHeight:                            {params.minPulseHeight}
-icarus_stage1_producers.gaushit2dTPCEW.HitFilterAlg.MinPulseSigma:                             {params.minPulseSigma}
-icarus_stage1_producers.gaushit2dTPCEW.LongMaxHits:                                            {params.LongMaxHits}
-icarus_stage1_producers.gaushit2dTPCEW.LongPulseWidth:                                         {params.LongPulseWidth}
-icarus_stage1_producers.gaushit2dTPCEW.PulseHeightCuts:                                        {params.PulseHeightCuts}
-icarus_stage1_producers.gaushit2dTPCEW.PulseWidthCuts:                                         {params.PulseWidthCuts}
-icarus_stage1_producers.gaushit2dTPCEW.PulseRatioCuts:                                         {params.PulseRatioCuts}
-icarus_stage1_producers.gaushit2dTPCEW.MaxMultiHit:                                            {params.MaxMultiHit}
-icarus_stage1_producers.gaushit2dTPCEW.Chi2NDF:                                                {params.Chi2NDF}
-
-icarus_stage1_producers.gaushit2dTPCWE.HitFinderToolVec.CandidateHitsPlane0.RoiThreshold:      {params.roiThreshold[0]}
-icarus_stage1_producers.gaushit2dTPCWE.HitFinderToolVec.CandidateHitsPlane1.RoiThreshold:      {params.roiThreshold[1]}
-icarus_stage1_producers.gaushit2dTPCWE.HitFinderToolVec.CandidateHitsPlane2.RoiThreshold:      {params.roiThreshold[2]}
-icarus_stage1_producers.gaushit2dTPCWE.HitFilterAlg.MinPulseHeight:                            {params.minPulseHeight}
-icarus_stage1_producers.gaushit2dTPCWE.HitFilterAlg.MinPulseSigma:                             {params.minPulseSigma}
-icarus_stage1_producers.gaushit2dTPCWE.LongMaxHits:                                            {params.LongMaxHits}
-icarus_stage1_producers.gaushit2dTPCWE.LongPulseWidth:                                         {params.LongPulseWidth}
-icarus_stage1_producers.gaushit2dTPCWE.PulseHeightCuts:                                        {params.PulseHeightCuts}
-icarus_stage1_producers.gaushit2dTPCWE.PulseWidthCuts:                                         {params.PulseWidthCuts}
-icarus_stage1_producers.gaushit2dTPCWE.PulseRatioCuts:                                         {params.PulseRatioCuts}
-icarus_stage1_producers.gaushit2dTPCWE.MaxMultiHit:                                            {params.MaxMultiHit}
-icarus_stage1_producers.gaushit2dTPCWE.Chi2NDF:                                                {params.Chi2NDF}
-
-icarus_stage1_producers.gaushit2dTPCWW.HitFinderToolVec.CandidateHitsPlane0.RoiThreshold:      {params.roiThreshold[0]}
-icarus_stage1_producers.gaushit2dTPCWW.HitFinderToolVec.CandidateHitsPlane1.RoiThreshold:      {params.roiThreshold[1]}
-icarus_stage1_producers.gaushit2dTPCWW.HitFinderToolVec.CandidateHitsPlane2.RoiThreshold:      {params.roiThreshold[2]}
-icarus_stage1_producers.gaushit2dTPCWW.HitFilterAlg.MinPulseHeight:                            {params.minPulseHeight}
-icarus_stage1_producers.gaushit2dTPCWW.HitFilterAlg.MinPulseSigma:                             {params.minPulseSigma}
-icarus_stage1_producers.gaushit2dTPCWW.LongMaxHits:                                            {params.LongMaxHits}
-icarus_stage1_producers.gaushit2dTPCWW.LongPulseWidth:                                         {params.LongPulseWidth}
-icarus_stage1_producers.gaushit2dTPCWW.PulseHeightCuts:                                        {params.PulseHeightCuts}
-icarus_stage1_producers.gaushit2dTPCWW.PulseWidthCuts:                                         {params.PulseWidthCuts}
-icarus_stage1_producers.gaushit2dTPCWW.PulseRatioCuts:                                         {params.PulseRatioCuts}
-icarus_stage1_producers.gaushit2dTPCWW.MaxMultiHit:                                            {params.MaxMultiHit}
-icarus_stage1_producers.gaushit2dTPCWW.Chi2NDF:                                                {params.Chi2NDF}
+'''
+
+_FCL_MC_FOOTER = '''
 
 icarus_stage1_producers.gaushit2dTPCWW.CalDataModuleLabel:                                     "wire2channelroi2d:PHYSCRATEDATATPCWW"
 icarus_stage1_producers.gaushit2dTPCWE.CalDataModuleLabel:                                     "wire2channelroi2d:PHYSCRATEDATATPCWE"
@@ -544,9 +775,9 @@ icarus_stage1_producers.cluster3DCryoE.Hit3DBuilderAlg.OutputHistograms:
 
 
 physics.producers:
-{{
+{
     @table::icarus_stage1_producers
-}}
+}
 
 physics.producers.channel2wire.WireModuleLabelVec: ["wire2channelroi2d:PHYSCRATEDATATPCEE", "wire2channelroi2d:PHYSCRATEDATATPCEW", "wire2channelroi2d:PHYSCRATEDATATPCWE", "wire2channelroi2d:PHYSCRATEDATATPCWW"]
 physics.producers.channel2wire.OutInstanceLabelVec: ["PHYSCRATEDATATPCEE", "PHYSCRATEDATATPCEW", "PHYSCRATEDATATPCWE", "PHYSCRATEDATATPCWW"]
@@ -575,10 +806,10 @@ services.BackTrackerService.BackTracker.OverrideRealData: true
 services.ParticleInventoryService.ParticleInventory.OverrideRealData: true
 
 physics.filters:
-{{}}
+{}
 
 physics.analyzers:
-{{}}
+{}
 
 physics.reco: [
                 channel2wire,
@@ -596,11 +827,8 @@ physics.outana:    [ ]
 
 physics.end_paths: [ outana, stream1 ]'''
 
-    with open(outputFile, 'w') as f:
-        f.write(fclStr)
-
-def generateFCL(params: fclParams, outputFile: str = "hitTuning.fcl", verbose: bool = False) -> None:
-    """Generate FCL configuration file for real data processing.
+def generateFCLMC(params: fclParams, outputFile: str = "hitTuningMC.fcl", verbose: bool = False) -> None:
+    """Generate FCL configuration file for Monte Carlo data processing.
     
     Args:
         params: FCL parameters to use in configuration
@@ -608,105 +836,60 @@ def generateFCL(params: fclParams, outputFile: str = "hitTuning.fcl", verbose: b
         verbose: Whether to print parameters to console
     """
     if verbose:
-        print("Generating new FHICL file with the following parameters:")
+        print("Generating new FHICL file for MC with the following parameters:")
         print(params.__str__())
 
-    fclStr=f'''
+    _write_fcl(outputFile, _FCL_MC_HEADER, 'icarus_stage1_producers', params, _FCL_MC_FOOTER)
+
+# Static parts of the real data FCL, written around the per-TPC hit-finder blocks
+_FCL_DATA_HEADER = '''
 # This includes running larcv as part of stage 1 processing
 #include "services_common_icarus.fcl"
 #include "wirechannelroiconverters_sbn.fcl"
 #include "stage1_run2_icarus.fcl"
 
-services:{{
+services:{
     @table::icarus_wirecalibration_services
-}}
+}
 
 icarus_stage1_producers:
-{{  
+{  
 ### TPC hit-finder producers
 gaushit2dTPCWW:                 @local::gausshit_sbn
 gaushit2dTPCWE:                 @local::gausshit_sbn
 gaushit2dTPCEW:                 @local::gausshit_sbn
 gaushit2dTPCEE:                 @local::gausshit_sbn
-}}
+}
 
 icarus_stage1_analyzers:
-{{}}
+{}
 
 icarus_stage1_filters:
-{{}}
+{}
 
 icarus_analysis_modules:
-{{}}
+{}
 
 # Lower thresholds for tighter filter width
-icarus_stage1_producers.gaushit2dTPCEE.HitFinderToolVec.CandidateHitsPlane0.RoiThreshold:      {params.roiThreshold[0]}
-icarus_stage1_producers.gaushit2dTPCEE.HitFinderToolVec.CandidateHitsPlane1.RoiThreshold:      {params.roiThreshold[1]}
-icarus_stage1_producers.gaushit2dTPCEE.HitFinderToolVec.CandidateHitsPlane2.RoiThreshold:      {params.roiThreshold[2]}
-icarus_stage1_producers.gaushit2dTPCEE.HitFilterAlg.MinPulseHeight:                            {params.minPulseHeight}
-icarus_stage1_producers.gaushit2dTPCEE.HitFilterAlg.MinPulseSigma:                             {params.minPulseSigma}
-icarus_stage1_producers.gaushit2dTPCEE.LongMaxHits:                                            {params.LongMaxHits}
-icarus_stage1_producers.gaushit2dTPCEE.LongPulseWidth:                                         {params.LongPulseWidth}
-icarus_stage1_producers.gaushit2dTPCEE.PulseHeightCuts:                                        {params.PulseHeightCuts}
-icarus_stage1_producers.gaushit2dTPCEE.PulseWidthCuts:                                         {params.PulseWidthCuts}
-icarus_stage1_producers.gaushit2dTPCEE.PulseRatioCuts:                                         {params.PulseRatioCuts}
-icarus_stage1_producers.gaushit2dTPCEE.MaxMultiHit:                                            {params.MaxMultiHit}
-icarus_stage1_producers.gaushit2dTPCEE.Chi2NDF:                                                {params.Chi2NDF}
-
-icarus_stage1_producers.gaushit2dTPCEW.HitFinderToolVec.CandidateHitsPlane0.RoiThreshold:      {params.roiThreshold[0]}
-icarus_stage1_producers.gaushit2dTPCEW.HitFinderToolVec.CandidateHitsPlane1.RoiThreshold:      {params.roiThreshold[1]}
-icarus_stage1_producers.gaushit2dTPCEW.HitFinderToolVec.CandidateHitsPlane2.RoiThreshold:      {params.roiThreshold[2]}
-icarus_stage1_producers.gaushit2dTPCEW.HitFilterAlg.MinPulseHeight:                            {params.minPulseHeight}
-icarus_stage1_producers.gaushit2dTPCEW.HitFilterAlg.MinPulseSigma:                             {params.minPulseSigma}
-icarus_stage1_producers.gaushit2dTPCEW.LongMaxHits:                                            {params.LongMaxHits}
-icarus_stage1_producers.gaushit2dTPCEW.LongPulseWidth:                                         {params.LongPulseWidth}
-icarus_stage1_producers.gaushit2dTPCEW.PulseHeightCuts:                                        {params.PulseHeightCuts}
-icarus_stage1_producers.gaushit2dTPCEW.PulseWidthCuts:                                         {params.PulseWidthCuts}
-icarus_stage1_producers.gaushit2dTPCEW.PulseRatioCuts:                                         {params.PulseRatioCuts}
-icarus_stage1_producers.gaushit2dTPCEW.MaxMultiHit:                                            {params.MaxMultiHit}
-icarus_stage1_producers.gaushit2dTPCEW.Chi2NDF:                                                {params.Chi2NDF}
-
-icarus_stage1_producers.gaushit2dTPCWE.HitFinderToolVec.CandidateHitsPlane0.RoiThreshold:      {params.roiThreshold[0]}
-icarus_stage1_producers.gaushit2dTPCWE.HitFinderToolVec.CandidateHitsPlane1.RoiThreshold:      {params.roiThreshold[1]}
-icarus_stage1_producers.gaushit2dTPCWE.HitFinderToolVec.CandidateHitsPlane2.RoiThreshold:      {params.roiThreshold[2]}
-icarus_stage1_producers.gaushit2dTPCWE.HitFilterAlg.MinPulseHeight:                            {params.minPulseHeight}
-icarus_stage1_producers.gaushit2dTPCWE.HitFilterAlg.MinPulseSigma:                             {params.minPulseSigma}
-icarus_stage1_producers.gaushit2dTPCWE.LongMaxHits:                                            {params.LongMaxHits}
-icarus_stage1_producers.gaushit2dTPCWE.LongPulseWidth:                                         {params.LongPulseWidth}
-icarus_stage1_producers.gaushit2dTPCWE.PulseHeightCuts:                                        {params.PulseHeightCuts}
-icarus_stage1_producers.gaushit2dTPCWE.PulseWidthCuts:                                         {params.PulseWidthCuts}
-icarus_stage1_producers.gaushit2dTPCWE.PulseRatioCuts:                                         {params.PulseRatioCuts}
-icarus_stage1_producers.gaushit2dTPCWE.MaxMultiHit:                                            {params.MaxMultiHit}
-icarus_stage1_producers.gaushit2dTPCWE.Chi2NDF:                                                {params.Chi2NDF}
-
-icarus_stage1_producers.gaushit2dTPCWW.HitFinderToolVec.CandidateHitsPlane0.RoiThreshold:      {params.roiThreshold[0]}
-icarus_stage1_producers.gaushit2dTPCWW.HitFinderToolVec.CandidateHitsPlane1.RoiThreshold:      {params.roiThreshold[1]}
-icarus_stage1_producers.gaushit2dTPCWW.HitFinderToolVec.CandidateHitsPlane2.RoiThreshold:      {params.roiThreshold[2]}
-icarus_stage1_producers.gaushit2dTPCWW.HitFilterAlg.MinPulseHeight:                            {params.minPulseHeight}
-icarus_stage1_producers.gaushit2dTPCWW.HitFilterAlg.MinPulseSigma:                             {params.minPulseSigma}
-icarus_stage1_producers.gaushit2dTPCWW.LongMaxHits:                                            {params.LongMaxHits}
-icarus_stage1_producers.gaushit2dTPCWW.LongPulseWidth:                                         {params.LongPulseWidth}
-icarus_stage1_producers.gaushit2dTPCWW.PulseHeightCuts:                                        {params.PulseHeightCuts}
-icarus_stage1_producers.gaushit2dTPCWW.PulseWidthCuts:                                         {params.PulseWidthCuts}
-icarus_stage1_producers.gaushit2dTPCWW.PulseRatioCuts:                                         {params.PulseRatioCuts}
-icarus_stage1_producers.gaushit2dTPCWW.MaxMultiHit:                                            {params.MaxMultiHit}
-icarus_stage1_producers.gaushit2dTPCWW.Chi2NDF:                                                {params.Chi2NDF}
+'''
+
+_FCL_DATA_FOOTER = '''
 
 physics.producers:
-{{
-    rns: {{module_type: RandomNumberSaver }}
+{
+    rns: {module_type: RandomNumberSaver }
     @table::icarus_stage1_producers
-}}
+}
 
 physics.filters:
-{{
+{
     @table::icarus_stage1_filters
-}}
+}
 
 physics.analyzers:
-{{
+{
     @table::icarus_stage1_analyzers
-}}
+}
 
 physics.producers.channel2wire.WireModuleLabelVec: ["wire2channelroi2d:PHYSCRATEDATATPCEE", "wire2channelroi2d:PHYSCRATEDATATPCEW", "wire2channelroi2d:PHYSCRATEDATATPCWE", "wire2channelroi2d:PHYSCRATEDATATPCWW"]
 physics.producers.channel2wire.OutInstanceLabelVec: ["PHYSCRATEDATATPCEE", "PHYSCRATEDATATPCEW", "PHYSCRATEDATATPCWE", "PHYSCRATEDATATPCWW"]
@@ -728,11 +911,8 @@ physics.outana:    [ ]
 physics.end_paths: [ outana, stream1 ]
     '''
 
-    with open(outputFile, 'w') as f:
-        f.write(fclStr)
-
-def generateFCLOverlay(params: fclParams, outputFile: str = "hitTuning.fcl", verbose: bool = False) -> None:
-    """Generate FCL configuration file for overlay data processing.
+def generateFCL(params: fclParams, outputFile: str = "hitTuning.fcl", verbose: bool = False) -> None:
+    """Generate FCL configuration file for real data processing.
     
     Args:
         params: FCL parameters to use in configuration
@@ -740,67 +920,22 @@ def generateFCLOverlay(params: fclParams, outputFile: str = "hitTuning.fcl", ver
         verbose: Whether to print parameters to console
     """
     if verbose:
-        print("Generating new FHICL Overlay file with the following parameters:")
+        print("Generating new FHICL file with the following parameters:")
         print(params.__str__())
 
-    fclStr=f'''
+    _write_fcl(outputFile, _FCL_DATA_HEADER, 'icarus_stage1_producers', params, _FCL_DATA_FOOTER)
+
+# Static parts of the overlay FCL, written around the per-TPC hit-finder blocks
+_FCL_OVERLAY_HEADER = '''
 #includes"stage1_run2_larcv_icarus_overlay.fcl"
 
-physics.producers.gaushit2dTPCEE.HitFinderToolVec.CandidateHitsPlane0.RoiThreshold:      {params.roiThreshold[0]}
-physics.producers.gaushit2dTPCEE.HitFinderToolVec.CandidateHitsPlane1.RoiThreshold:      {params.roiThreshold[1]}
-physics.producers.gaushit2dTPCEE.HitFinderToolVec.CandidateHitsPlane2.RoiThreshold:      {params.roiThreshold[2]}
-physics.producers.gaushit2dTPCEE.HitFilterAlg.MinPulseHeight:                            {params.minPulseHeight}
-physics.producers.gaushit2dTPCEE.HitFilterAlg.MinPulseSigma:                             {params.minPulseSigma}
-physics.producers.gaushit2dTPCEE.LongMaxHits:                                            {params.LongMaxHits}
-physics.producers.gaushit2dTPCEE.LongPulseWidth:                                         {params.LongPulseWidth}
-physics.producers.gaushit2dTPCEE.PulseHeightCuts:                                        {params.PulseHeightCuts}
-physics.producers.gaushit2dTPCEE.PulseWidthCuts:                                         {params.PulseWidthCuts}
-physics.producers.gaushit2dTPCEE.PulseRatioCuts:                                         {params.PulseRatioCuts}
-physics.producers.gaushit2dTPCEE.MaxMultiHit:                                            {params.MaxMultiHit}
-physics.producers.gaushit2dTPCEE.Chi2NDF:                                                {params.Chi2NDF}
-
-physics.producers.gaushit2dTPCEW.HitFinderToolVec.CandidateHitsPlane0.RoiThreshold:      {params.roiThreshold[0]}
-physics.producers.gaushit2dTPCEW.HitFinderToolVec.CandidateHitsPlane1.RoiThreshold:      {params.roiThreshold[1]}
-physics.producers.gaushit2dTPCEW.HitFinderToolVec.CandidateHitsPlane2.RoiThreshold:      {params.roiThreshold[2]}
-physics.producers.gaushit2dTPCEW.HitFilterAlg.MinPulseHeight:                            {params.minPulseHeight}
-physics.producers.gaushit2dTPCEW.HitFilterAlg.MinPulseSigma:                             {params.minPulseSigma}
-physics.producers.gaushit2dTPCEW.LongMaxHits:                                            {params.LongMaxHits}
-physics.producers.gaushit2dTPCEW.LongPulseWidth:                                         {params.LongPulseWidth}
-physics.producers.gaushit2dTPCEW.PulseHeightCuts:                                        {params.PulseHeightCuts}
-physics.producers.gaushit2dTPCEW.PulseWidthCuts:                                         {params.PulseWidthCuts}
-physics.producers.gaushit2dTPCEW.PulseRatioCuts:                                         {params.PulseRatioCuts}
-physics.producers.gaushit2dTPCEW.MaxMultiHit:                                            {params.MaxMultiHit}
-physics.producers.gaushit2dTPCEW.Chi2NDF:                                                {params.Chi2NDF}
-
-physics.producers.gaushit2dTPCWE.HitFinderToolVec.CandidateHitsPlane0.RoiThreshold:      {params.roiThreshold[0]}
-physics.producers.gaushit2dTPCWE.HitFinderToolVec.CandidateHitsPlane1.RoiThreshold:      {params.roiThreshold[1]}
-physics.producers.gaushit2dTPCWE.HitFinderToolVec.CandidateHitsPlane2.RoiThreshold:      {params.roiThreshold[2]}
-physics.producers.gaushit2dTPCWE.HitFilterAlg.MinPulseHeight:                            {params.minPulseHeight}
-physics.producers.gaushit2dTPCWE.HitFilterAlg.MinPulseSigma:                             {params.minPulseSigma}
-physics.producers.gaushit2dTPCWE.LongMaxHits:                                            {params.LongMaxHits}
-physics.producers.gaushit2dTPCWE.LongPulseWidth:                                         {params.LongPulseWidth}
-physics.producers.gaushit2dTPCWE.PulseHeightCuts:                                        {params.PulseHeightCuts}
-physics.producers.gaushit2dTPCWE.PulseWidthCuts:                                         {params.PulseWidthCuts}
-physics.producers.gaushit2dTPCWE.PulseRatioCuts:                                         {params.PulseRatioCuts}
-physics.producers.gaushit2dTPCWE.MaxMultiHit:                                            {params.MaxMultiHit}
-physics.producers.gaushit2dTPCWE.Chi2NDF:                                                {params.Chi2NDF}
-
-physics.producers.gaushit2dTPCWW.HitFinderToolVec.CandidateHitsPlane0.RoiThreshold:      {params.roiThreshold[0]}
-physics.producers.gaushit2dTPCWW.HitFinderToolVec.CandidateHitsPlane1.RoiThreshold:      {params.roiThreshold[1]}
-physics.producers.gaushit2dTPCWW.HitFinderToolVec.CandidateHitsPlane2.RoiThreshold:      {params.roiThreshold[2]}
-physics.producers.gaushit2dTPCWW.HitFilterAlg.MinPulseHeight:                            {params.minPulseHeight}
-physics.producers.gaushit2dTPCWW.HitFilterAlg.MinPulseSigma:                             {params.minPulseSigma}
-physics.producers.gaushit2dTPCWW.LongMaxHits:                                            {params.LongMaxHits}
-physics.producers.gaushit2dTPCWW.LongPulseWidth:                                         {params.LongPulseWidth}
-physics.producers.gaushit2dTPCWW.PulseHeightCuts:                                        {params.PulseHeightCuts}
-physics.producers.gaushit2dTPCWW.PulseWidthCuts:                                         {params.PulseWidthCuts}
-physics.producers.gaushit2dTPCWW.PulseRatioCuts:                                         {params.PulseRatioCuts}
-physics.producers.gaushit2dTPCWW.MaxMultiHit:                                            {params.MaxMultiHit}
-physics.producers.gaushit2dTPCWW.Chi2NDF:                                                {params.Chi2NDF}
-
-physics.filters: {{}}
-
-physics.analyzers: {{}}
+'''
+
+_FCL_OVERLAY_FOOTER = '''
+
+physics.filters: {}
+
+physics.analyzers: {}
 
 physics.reco: [
                 gaushit2dTPCEW,
@@ -814,10 +949,21 @@ physics.outana:    [ ]
 physics.end_paths: [ outana, stream1 ]
     '''
 
-    with open(outputFile, 'w') as f:
-        f.write(fclStr)
+def generateFCLOverlay(params: fclParams, outputFile: str = "hitTuning.fcl", verbose: bool = False) -> None:
+    """Generate FCL configuration file for overlay data processing.
+    
+    Args:
+        params: FCL parameters to use in configuration
+        outputFile: Path to output FCL file
+        verbose: Whether to print parameters to console
+    """
+    if verbose:
+        print("Generating new FHICL Overlay file with the following parameters:")
+        print(params.__str__())
+
+    _write_fcl(outputFile, _FCL_OVERLAY_HEADER, 'physics.producers', params, _FCL_OVERLAY_FOOTER)
 
-def run(fclFile: str, inputFile: str, outputFile: str, options: Optional[str] = None) -> None:
+def run(fclFile: str, inputFile: str, outputFile: str, options: Optional[str] = None) -> int:
     """Run LArSoft with specified FCL file and input.
     
     Args:
@@ -825,81 +971,286 @@ def run(fclFile: str, inputFile: str, outputFile: str, options: Optional[str] =
         inputFile: Path to input ROOT file or file list
         outputFile: Path to output ROOT file
         options: Additional command-line options for lar command
+
+    Returns:
+        Exit status of lar
     """
+    # lar is started directly (no intermediate shell), so paths need no quoting
     if not inputFile.endswith('.root'):
-        cmd = f"lar -c {fclFile} --source-list {inputFile} -o {outputFile}"
+        argv = ['lar', '-c', fclFile, '--source-list', inputFile, '-o', outputFile]
     else:
-        cmd = f"lar -c {fclFile} -s {inputFile} -o {outputFile}"
+        argv = ['lar', '-c', fclFile, '-s', inputFile, '-o', outputFile]
     if options != None:
         print("Adding options:", options)
-        cmd += ' ' + options
+        argv += shlex.split(options)
     else:
         print("run on all events")
-        cmd += ' -n -1'
-    print(f"Running command: {cmd}")
-    os.system(cmd)
+        argv += ['-n', '-1']
+    print(f"Running command: {shlex.join(argv)}")
+    return subprocess.run(argv, check=False).returncode
 
-def reduceList(inputList: List[Union[int, float]]) -> Union[List[Union[int, float]], int, float]:
-    """Reduce single-element list to scalar value.
+def _next_version(outputDir: str, fileSubStr: str) -> int:
+    """Find the version one past the highest existing hitTuning_{tag}_{version}.fcl file.
     
     Args:
-        inputList: List of values
+        outputDir: Directory holding the FCL files
+        fileSubStr: Tag of the FCL files
         
     Returns:
-        Single value if list has one element, otherwise the original list
+        One past the highest existing version, 0 if there is none
     """
-    if len(inputList) == 1:
-        return inputList[0]
-    return inputList
+    pattern = re.compile(rf'hitTuning_{re.escape(fileSubStr)}_(\d+)\.fcl')
+    with os.scandir(outputDir) as it:
+        versions = [int(m.group(1)) for entry in it if (m := pattern.fullmatch(entry.name))]
+    return max(versions, default=-1) + 1
 
-def createGrid(defaultFirst: bool = True) -> List[fclParams]:
-    """Create parameter grid for systematic hit tuning scan.
+# Set once the ROOT interpreter has the gallery headers and macro loaded
+_root_ready = False
+
+def setup_root(macroPath: Optional[str] = None, mc: bool = True) -> None:
+    """Prepare the ROOT interpreter for the gallery macros, once per process.
+    
+    Declares the gallery headers and compiles galleryMC.cpp (MC) or
+    galleryMacro.cpp (data) with ACLiC. Later calls do nothing.
     
     Args:
-        defaultFirst: Whether to insert default parameters at the start of grid
+        macroPath: Directory holding the macro, added to the ROOT search paths;
+            if None the macro is taken from the current directory
+        mc: Whether to load the MC macro instead of the data one
+        
+    Raises:
+        FileNotFoundError: If the macro is not found in macroPath
+    """
+    global _root_ready
+    if _root_ready:
+        return
+
+    import ROOT as r
+
+    macro = 'galleryMC.cpp' if mc else 'galleryMacro.cpp'
+    if macroPath is not None:
+        abs_macro = os.path.abspath(os.path.join(macroPath, macro))
+        print(f"Attempting to load macro from: {abs_macro}")
+
+        try:
+            r.gSystem.AddDynamicPath(macroPath)
+            r.gInterpreter.AddIncludePath(macroPath)
+            r.gROOT.SetMacroPath(r.gROOT.GetMacroPath() + f":{macroPath}/")
+        except Exception as e:
+            print(f"Warning: failed to add macro paths: {e}")
+    else:
+        abs_macro = macro
+
+    r.gInterpreter.ProcessLine('#include "gallery/Event.h"')
+    r.gInterpreter.ProcessLine('#include "canvas/Persistency/Common/FindManyP.h"')
+    r.gInterpreter.ProcessLine('#include "canvas/Utilities/InputTag.h"')
+    if macroPath is not None and not os.path.exists(abs_macro):
+        raise FileNotFoundError(
+            f"{macro} not found at {abs_macro}. "
+            "Stage the macro with the job and pass the correct macroPath."
+        )
+
+    result = r.gROOT.ProcessLine(f'.L {abs_macro}+')
+    print(f"Compilation result: {result}")
+    _root_ready = True
+
+def _process_param_set(point: Tuple[int, fclParams], outputDir: str, fileSubStr: str, inputFile: str,
+                       firstVersion: int, db: Optional[HitTuningDB] = None, mc: bool = True,
+                       runNumber: int = 0, debug: bool = False) -> None:
+    """Generate, run and score one parameter set of the interactive scan.
+    
+    Failures are reported and swallowed, so that the rest of the scan goes on.
+    
+    Args:
+        point: Tuple of (index in the scan, parameters)
+        outputDir: Directory for the FCL, output and histogram files
+        fileSubStr: Tag of the output files
+        inputFile: Path to input ROOT file or file list
+        firstVersion: Version of the first parameter set of the scan
+        db: Database recording the run, left open; None to open a per-set
+            hitTuning_{tag}_{version}.db, used when sets run in parallel
+        mc: Whether to run on MC (selects the FCL and the gallery macro)
+        runNumber: Job number recorded with the run
+        debug: Whether to process only a couple of events
+    """
+    ip, params = point
+    version = firstVersion + ip
+    ownDB = db is None
+    if ownDB:
+        db = HitTuningDB(f"hitTuning_{fileSubStr}_{version}.db")
+    try:
+        setup_root(mc=mc)  # no-op unless this is a fresh worker process
+        import ROOT as r
+
+        outputFCL = f'{outputDir}/hitTuning_{fileSubStr}_{version}.fcl'
+        outputFile = f'{outputDir}/output_{fileSubStr}_{version}.root'
+
+        # Generate FCL file
+        if mc:
+            generateFCLMC(params, outputFile=outputFCL)
+        else:   
+            generateFCL(params, outputFile=outputFCL)
+
+        # Add to database   
+        run_id = db.add_run(params, runNumber, outputFCL, notes="") 
+        print(f"Added run with ID: {run_id}")
+
+        if debug:
+            options = '-n 2'  # Process only 1 events in debug mode
+        else:
+            options = None
+        # Run lar with generated FCL
+        status = run(outputFCL, inputFile, outputFile, options=options)
+        if status != 0:
+            raise RuntimeError(f"lar exited with status {status}, skipping scoring")
+        # Record the lar output now, so it is kept even if scoring fails
+        db.finalize_run(run_id, output_filename=outputFile)
+        
+        # Query runs (a per-set DB only ever holds this run)
+        if not ownDB:
+            print(f"Total runs in database: {db.count_runs()}")
+
+        histFile = f'{outputDir}/hist_output_{fileSubStr}_{version}.root'
+
+        if mc:
+            results = r.galleryMC(outputFile, histFile)
+            print("results:", results)
+        else:
+            r.galleryMacro(outputFile, histFile)
+            results = None
+
+        # Record histogram file and results in a single update
+        db.finalize_run(run_id, hist_filename=histFile, results=results)
+
+    except Exception as e:
+        print(f"Error processing parameter set {ip}: {e}")
+    finally:
+        if ownDB:
+            db.close()
+
+def _params_digest(params: fclParams) -> bytes:
+    """Digest of all parameter values; equal digests render to identical FCL files.
+    
+    Args:
+        params: FCL parameters
         
     Returns:
-        List of fclParams objects representing parameter combinations
+        16-byte BLAKE2b digest
     """
-    print("Creating parameter grid for hit tuning...")
+    return blake2b(repr(tuple(vars(params).values())).encode(), digest_size=16).digest()
 
-    v_roiThreshold = [[8.0], [7.0], [6.0], [5.0], [4.0], [3.0], [2.0], [1.0]]  
-    v_minPulseHeight = [[2.0]]
-    v_minPulseSigma = [[1.0]]
-    v_LongMaxHits = [[1], [2], [5], [7], [10], [13], [15]]
-    v_LongPulseWidth = [[2.0], [3.0], [5.0], [6.0], [8.0], [10.0]]
-    v_PulseHeightCuts = [[2], [3]]
-    v_PulseWidthCuts = [[2, 1.5, 1]]  
-    v_PulseRatioCuts = [[3.5e-1, 4e-1, 2e-1]]
-    v_MaxMultiHit = [[5], [7], [10], [12]]
-    v_Chi2NDF = [[10], [20], [50], [100], [200], [500.0], [1000.0], [1500.0], [2000.0], [2500.0]]
+def _generate_grid_fcl(job: Tuple[Callable[..., None], fclParams, str, bool, Optional[str]]) -> str:
+    """Write one grid-point FCL; process-pool worker for `--createGrid`.
+    
+    A grid point identical to an earlier one is not rendered again: its FCL
+    becomes a symlink to the earlier file instead.
 
-    # Generate all combinations
-    param_grid = []
-    for combo in product(v_roiThreshold, v_minPulseHeight, v_minPulseSigma, 
-                        v_LongMaxHits, v_LongPulseWidth, v_PulseHeightCuts,
-                        v_PulseWidthCuts, v_PulseRatioCuts, v_MaxMultiHit, v_Chi2NDF):
+    Args:
+        job: Tuple of (FCL generator function, parameters, output FCL path,
+            verbose, path of an identical FCL already in the grid or None)
+
+    Returns:
+        Path of the written FCL file
+    """
+    generate, params, outputFCL, verbose, original = job
+    # Never write through, or keep, a link left by an earlier grid
+    if os.path.islink(outputFCL) or (original is not None and os.path.exists(outputFCL)):
+        os.remove(outputFCL)
+    if original is not None:
+        os.symlink(os.path.basename(original), outputFCL)
+    else:
+        generate(params, outputFile=outputFCL, verbose=verbose)
+    return outputFCL
+
+def _generate_grid_fcls(jobs: List[Tuple[Callable[..., None], fclParams, str, bool, Optional[str]]]) -> List[str]:
+    """Write a batch of grid-point FCLs; see `_generate_grid_fcl`."""
+    return [_generate_grid_fcl(job) for job in jobs]
+
+def _bounded_map(ex: Executor, fn: Callable[[Any], Any], iterable: Iterable[Any], window: int) -> Iterator[Any]:
+    """Like `ex.map(fn, iterable)`, but with at most `window` tasks in flight.
+    
+    `Executor.map` submits the whole iterable at once; here it is consumed
+    only as results are taken, so a lazy input is never materialized.
+    
+    Args:
+        ex: Executor running the tasks
+        fn: Function applied to every item
+        iterable: Items to process
+        window: Maximum number of submitted tasks whose result was not yet yielded
         
-        print(combo[0], combo[1], combo[2], combo[3], combo[4], combo[5], combo[6], combo[7], combo[8], combo[9])
-        params = fclParams(
-            roiThreshold=reduceList(combo[0]),
-            minPulseHeight=reduceList(combo[1]),
-            minPulseSigma=reduceList(combo[2]),
-            LongMaxHits=reduceList(combo[3]),
-            LongPulseWidth=reduceList(combo[4]),
-            PulseHeightCuts=reduceList(combo[5]),
-            PulseWidthCuts=reduceList(combo[6]),
-            PulseRatioCuts=reduceList(combo[7]),
-            MaxMultiHit=reduceList(combo[8]),
-            Chi2NDF=reduceList(combo[9])
-        )
-        param_grid.append(params)
+    Yields:
+        Results of `fn`, in input order
+    """
+    pending = deque()
+    for item in iterable:
+        pending.append(ex.submit(fn, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+# Values scanned by createGrid, in the order of the fclParams fields they set
+_GRID_VALUES = (
+    [[8.0], [7.0], [6.0], [5.0], [4.0], [3.0], [2.0], [1.0]],  # roiThreshold
+    [[2.0]],  # minPulseHeight
+    [[1.0]],  # minPulseSigma
+    [[1], [2], [5], [7], [10], [13], [15]],  # LongMaxHits
+    [[2.0], [3.0], [5.0], [6.0], [8.0], [10.0]],  # LongPulseWidth
+    [[2], [3]],  # PulseHeightCuts
+    [[2, 1.5, 1]],  # PulseWidthCuts
+    [[3.5e-1, 4e-1, 2e-1]],  # PulseRatioCuts
+    [[5], [7], [10], [12]],  # MaxMultiHit
+    [[10], [20], [50], [100], [200], [500.0], [1000.0], [1500.0], [2000.0], [2500.0]],  # Chi2NDF
+)
+
+def gridSize(defaultFirst: bool = True) -> int:
+    """Number of parameter sets produced by createGrid, without generating them.
+    
+    Args:
+        defaultFirst: Whether the default parameters are inserted at the start of grid
+        
+    Returns:
+        Number of parameter combinations in the grid
+    """
+    return prod(len(values) for values in _GRID_VALUES) + int(defaultFirst)
+
+def createGrid(defaultFirst: bool = True, verbose: bool = False) -> Iterator[fclParams]:
+    """Create parameter grid for systematic hit tuning scan.
     
+    The grid is generated lazily, one combination at a time.
+
+    Args:
+        defaultFirst: Whether to insert default parameters at the start of grid
+        verbose: Whether to print every parameter combination to console
+        
+    Yields:
+        fclParams objects representing parameter combinations
+    """
+    print("Creating parameter grid for hit tuning...")
+
     if defaultFirst:
-        param_grid.insert(0, fclParams())  # Default parameters at the start
+        yield fclParams()  # Default parameters at the start
 
-    print(f"Created grid with {len(param_grid)} parameter combinations")
-    return param_grid
+    # Single-element lists stand for a scalar; reduce every value up front
+    # rather than once per combination
+    values = [[v[0] if len(v) == 1 else v for v in options] for options in _GRID_VALUES]
+
+    # Generate all combinations
+    for combo in product(*values):
+        if verbose:
+            print(*combo)
+        yield fclParams(
+            roiThreshold=combo[0],
+            minPulseHeight=combo[1],
+            minPulseSigma=combo[2],
+            LongMaxHits=combo[3],
+            LongPulseWidth=combo[4],
+            PulseHeightCuts=combo[5],
+            PulseWidthCuts=combo[6],
+            PulseRatioCuts=combo[7],
+            MaxMultiHit=combo[8],
+            Chi2NDF=combo[9]
+        )
 
 def parse_args() -> argparse.Namespace:
     """Parse command-line arguments.
@@ -919,6 +1270,7 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument('-i', '--inputFile', type=str, default='', help='Input file to process')
     parser.add_argument('-f', '--fclFile', type=str, default='', help='FCL file to use when running over grid')
     parser.add_argument('-n', '--runNumber', type=int, default=0, help='Run number for the job when running over grid')
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='Number of parameter sets processed in parallel (interactive mode)')
     parser.add_argument('-p', '--path', type=str, default=None, help='Path to macros when running over grid')
     return parser.parse_args()
 
@@ -932,27 +1284,46 @@ if __name__ == "__main__":
 
     #create the fcl files for a grid search, and then exit...
     if args.createGrid:
-        paramGrid = createGrid()
-        for ip, params in enumerate(paramGrid):
-            if args.debug:
-                if ip > 1: break
-            if ip % 100 == 0:
-                print(f"Creating FCL for parameter set {ip}/{len(paramGrid)}")
-            
-            if not os.path.exists(args.outputDir):
-                os.makedirs(args.outputDir)
+        paramGrid = createGrid(verbose=args.verbose)
+        total = gridSize()
+        if args.debug:
+            paramGrid = islice(paramGrid, 2)
+            total = min(total, 2)
+
+        os.makedirs(args.outputDir, exist_ok=True)
+        if args.overlay:
+            generate = generateFCLOverlay
+        elif MC:
+            generate = generateFCLMC
+        else:
+            generate = generateFCL
+
+        # Identical grid points are written once, the repeats link to that file
+        firstFCL = {}
+        def gridJob(ip: int, params: fclParams) -> Tuple[Callable[..., None], fclParams, str, bool, Optional[str]]:
             outputFCL = f'{args.outputDir}/hitTuning_{fileSubStr}_{ip}.fcl'
-            if args.overlay:
-                generateFCLOverlay(params, outputFile=outputFCL, verbose=args.verbose)
-            else:
-                if MC:
-                    generateFCLMC(params, outputFile=outputFCL, verbose=args.verbose)
-                else:   
-                    generateFCL(params, outputFile=outputFCL, verbose=args.verbose)
+            original = firstFCL.setdefault(_params_digest(params), outputFCL)
+            return generate, params, outputFCL, args.verbose, (None if original == outputFCL else original)
+
+        # Grid points are independent, so the FCL files are written by a pool
+        # of processes, in batches of 32 to keep the pickling overhead per file
+        # small. Only two batches per worker are queued at any time, so the
+        # grid is generated as the files get written
+        workers = os.cpu_count() or 1
+        jobs = (gridJob(ip, params) for ip, params in enumerate(paramGrid))
+        batches = iter(lambda: list(islice(jobs, 32)), [])
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            written = chain.from_iterable(_bounded_map(ex, _generate_grid_fcls, batches, 2 * workers))
+            for ip, _ in enumerate(written):
+                if ip % 100 == 0:
+                    print(f"Creating FCL for parameter set {ip}/{total}")
         exit(0)
 
 
     # Here the code is activated if the -c option in not present...
+    # ROOT is only needed from here on: importing it is slow, so FCL creation skips it
+    import ROOT as r
+
     # Initialize database
     db = HitTuningDB(f"hitTuning_{fileSubStr}.db")
 
@@ -988,30 +1359,8 @@ if __name__ == "__main__":
         jobNum = args.runNumber
         macroPath = args.path
 
-        # Load the macro (interpreted)
-        abs_macro = os.path.join(macroPath, 'galleryMC.cpp')
-        if not os.path.isabs(abs_macro):
-            abs_macro = os.path.abspath(abs_macro)
-        print(f"Attempting to load macro from: {abs_macro}")
-
-        try:
-            r.gSystem.AddDynamicPath(macroPath)
-            r.gInterpreter.AddIncludePath(macroPath)
-            r.gROOT.SetMacroPath(r.gROOT.GetMacroPath() + f":{macroPath}/")
-        except Exception as e:
-            print(f"Warning: failed to add macro paths: {e}")
-        r.gInterpreter.ProcessLine('#include "gallery/Event.h"')
-        r.gInterpreter.ProcessLine('#include "canvas/Persistency/Common/FindManyP.h"')
-        r.gInterpreter.ProcessLine('#include "canvas/Utilities/InputTag.h"')
-        if not os.path.exists(abs_macro):
-            raise FileNotFoundError(
-                f"galleryMC.cpp not found at {abs_macro}. "
-                "Stage the macro with the job and pass the correct macroPath."
-            )
-
-        # Explicitly load via absolute path
-        result = r.gROOT.ProcessLine(f'.L {abs_macro}+')    
-        print(f"Compilation result: {result}")
+        # Load the macro (compiled once per process)
+        setup_root(macroPath, mc=True)
 
         # Initialize database
         db = HitTuningDB(f"hitTuning_{jobNum}.db")
@@ -1022,20 +1371,24 @@ if __name__ == "__main__":
         print(f"Added run with ID: {run_id}")
 
         # Run lar with generated FCL
-        run(fclFile, inputFile, outputFile, options='-n-1')
-        
-        # Later, update with output filename
-        db.update_output_filename(run_id, outputFile)
+        status = run(fclFile, inputFile, outputFile, options='-n-1')
+        if status != 0:
+            print(f"Error: lar exited with status {status}, skipping scoring")
+            db.close()
+            sys.exit(1)
+        # Record the lar output now, so it is kept even if scoring fails
+        db.finalize_run(run_id, output_filename=outputFile)
         
         # Query runs
-        all_runs = db.get_all_runs()
-        print(f"Total runs in database: {len(all_runs)}")
+        print(f"Total runs in database: {db.count_runs()}")
 
         histFile = f'hist_output_{jobNum}.root'
         print(f"Processing hits with outputFile: {outputFile} and histFile: {histFile}")
         results = r.galleryMC(outputFile, histFile)
         print("results:", results)
-        db.update_results(run_id, results)
+
+        # Record histogram file and results in a single update
+        db.finalize_run(run_id, hist_filename=histFile, results=results)
 
         db.close()
 
@@ -1044,15 +1397,8 @@ if __name__ == "__main__":
     ## run interactively over specified parameter sets
     else:
 
-        # Load the macro (interpreted)
-        r.gInterpreter.ProcessLine('#include "gallery/Event.h"')
-        r.gInterpreter.ProcessLine('#include "canvas/Persistency/Common/FindManyP.h"')
-        r.gInterpreter.ProcessLine('#include "canvas/Utilities/InputTag.h"')
-        if args.mc:
-            result = r.gROOT.ProcessLine('.L galleryMC.cpp+')
-        else:
-            result = r.gROOT.ProcessLine('.L galleryMacro.cpp+')
-        print(f"Compilation result: {result}")
+        # Load the macro (compiled once per process)
+        setup_root(mc=args.mc)
 
         # Set output directory for fcl files
         outputDir = args.outputDir
@@ -1086,57 +1432,32 @@ if __name__ == "__main__":
         #         LongMaxHits=[10, 10, 10]) #turn on pulse trains
         paramGrid = [defaultParams]
 
-    for ip, params in enumerate(paramGrid):
-
-        # if ip > 5: 
-        #     break
-        try:
-            version = 0
-            outputFCL = f'{outputDir}/hitTuning_{fileSubStr}_{version}.fcl'
-            outputFile = f'{outputDir}/output_{fileSubStr}_{version}.root'
-
-            while os.path.exists(outputFCL):
-                version += 1
-                outputFCL = f'{outputDir}/hitTuning_{fileSubStr}_{version}.fcl'
-                outputFile = f'{outputDir}/output_{fileSubStr}_{version}.root'
-
-            # Generate FCL file
-            if MC:
-                generateFCLMC(params, outputFile=outputFCL)
-            else:   
-                generateFCL(params, outputFile=outputFCL)
-
-            # Add to database   
-            run_id = db.add_run(params, args.runNumber, outputFCL, notes="") 
-            print(f"Added run with ID: {run_id}")
-
-            if args.debug:
-                options = '-n 2'  # Process only 1 events in debug mode
-            else:
-                options = None
-            # Run lar with generated FCL
-            run(outputFCL, inputFile, outputFile, options=options)
-            
-            # Later, update with output filename
-            db.update_output_filename(run_id, outputFile)
-            
-            # Query runs
-            all_runs = db.get_all_runs()
-            print(f"Total runs in database: {len(all_runs)}")
-
-            histFile = f'{outputDir}/hist_output_{fileSubStr}_{version}.root'
-
-            if args.mc:
-                results = r.galleryMC(outputFile, histFile)
-                print("results:", results)
-                db.update_results(run_id, results)
-            else:
-                r.galleryMacro(outputFile, histFile)
-        
-        except Exception as e:
-            print(f"Error processing parameter set {ip}: {e}")
-            continue
-    
-    db.close()
+    # One directory scan for the whole loop: every parameter set takes the next version
+    firstVersion = _next_version(outputDir, fileSubStr)
 
+    processParamSet = partial(_process_param_set, outputDir=outputDir, fileSubStr=fileSubStr,
+                              inputFile=inputFile, firstVersion=firstVersion, mc=MC,
+                              runNumber=args.runNumber, debug=args.debug)
 
+    if args.jobs > 1:
+        # Every set runs in a fresh process, with its own lar and ROOT
+        # interpreter (the macro is already compiled above, so workers only
+        # load it), and fills its own DB; these are merged at the end
+        db.close()
+        with ProcessPoolExecutor(max_workers=args.jobs, mp_context=get_context('spawn')) as ex:
+            list(ex.map(processParamSet, enumerate(paramGrid)))
+
+        from mergeDBFiles import merge_sqlite_dbs
+        shards = [f"hitTuning_{fileSubStr}_{firstVersion + ip}.db" for ip in range(len(paramGrid))]
+        shards = [shard for shard in shards if os.path.exists(shard)]
+        merge_sqlite_dbs(shards, f"hitTuning_{fileSubStr}.db")
+        for shard in shards:
+            os.remove(shard)
+    else:
+        # All sets share the connection opened above. Each run is still
+        # committed on its own (once when added, once when finalized): a
+        # transaction spanning the loop would hold the write lock while lar
+        # runs and lose every finished set if the scan is interrupted
+        for point in enumerate(paramGrid):
+            processParamSet(point, db=db)
+        db.close()
@@ -1,80 +1,226 @@
 import os
 import sqlite3
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import repeat
 
-import sqlite3
+# Default SQLITE_MAX_ATTACHED: how many source DBs can be attached at once
+_MAX_ATTACHED = 10
+
+def _table_schema(db_file, table):
+    """
+    Return the CREATE TABLE statement of a table in an SQLite file.
+    """
+    src_conn = sqlite3.connect(db_file)
+    try:
+        row = src_conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type='table' AND name=?",
+            (table,),
+        ).fetchone()
+    finally:
+        src_conn.close()
+    if not row or not row[0]:
+        raise RuntimeError(f"Cannot get schema for table '{table}' from {db_file}")
+    return row[0]
 
-def merge_sqlite_dbs(db_files, dest_db, table="runs", conflict="ignore"):
+def merge_sqlite_dbs(db_files, dest_db, table="runs", conflict="ignore", schema=None):
     """
     Merge a list of SQLite .db files into a single destination DB.
 
     - db_files: list of source .db file paths
     - dest_db: path to the merged .db file
     - table: table name to merge (assumes same schema in all DBs)
-    - conflict: 'ignore' or 'replace' for duplicate primary keys
+    - conflict: 'ignore' or 'replace' for rows violating a constraint of the
+      destination table (ids are not copied, so these are UNIQUE columns)
+    - schema: CREATE TABLE statement used if dest_db lacks the table
+      (default: the one of the first DB)
     """
     if not db_files:
         print("No DB files to merge.")
         return
 
-    # Open destination (created if it doesn't exist)
-    dest_conn = sqlite3.connect(dest_db)
+    # Open destination (created if it doesn't exist); transactions are explicit
+    fresh = not os.path.exists(dest_db) or os.path.getsize(dest_db) == 0
+    dest_conn = sqlite3.connect(dest_db, isolation_level=None)
     dest_cur = dest_conn.cursor()
+    if fresh:
+        # A destination created here only holds copies of the sources: it is
+        # removed if the merge fails, so it can skip journaling and fsyncs
+        dest_cur.executescript("""
+            PRAGMA main.journal_mode=OFF;
+            PRAGMA main.synchronous=OFF;
+            PRAGMA main.locking_mode=EXCLUSIVE;
+        """)
+    else:
+        # An existing destination may hold rows found in no source (e.g.
+        # earlier merges): keep a rollback journal, which also takes it out of WAL
+        dest_cur.execute("PRAGMA main.journal_mode=DELETE")
+    dest_cur.executescript("""
+        PRAGMA main.cache_size=-524288;
+        PRAGMA main.mmap_size=1073741824;
+        PRAGMA temp_store=MEMORY;
+    """)
 
-    # Use first DB as template for schema if table missing
-    first_db = db_files[0]
-    print(first_db)
-    with sqlite3.connect(first_db) as src_conn:
-        # Make sure table exists in dest with same schema
+    merged = False
+    dropped_indexes = []
+    try:
+        # Make sure table exists in dest, using the first DB as template for its schema
+        first_db = db_files[0]
+        print(first_db)
         dest_cur.execute(
             "SELECT name FROM sqlite_master WHERE type='table' AND name=?",
             (table,),
         )
         if dest_cur.fetchone() is None:
-            src_cur = src_conn.cursor()
-            src_cur.execute(
-                "SELECT sql FROM sqlite_master WHERE type='table' AND name=?",
-                (table,),
-            )
-            row = src_cur.fetchone()
-            if not row or not row[0]:
-                raise RuntimeError(f"Cannot get schema for table '{table}' from {first_db}")
-            dest_cur.execute(row[0])
-            dest_conn.commit()
-
-    # Merge all DBs
-    for path in db_files:
-        print(f"Merging {path}")
-        # Attach each DB and bulk-copy rows
+            dest_cur.execute(schema or _table_schema(first_db, table))
+
+        # Drop the secondary indexes of the destination table while copying and
+        # build them once at the end (automatic PK/UNIQUE indexes have no SQL)
+        dest_cur.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type='index' AND tbl_name=? AND sql IS NOT NULL",
+            (table,),
+        )
+        for name, index_sql in dest_cur.fetchall():
+            dest_cur.execute(f"DROP INDEX '{name}'")
+            dropped_indexes.append(index_sql)
+
+        # All DBs share the schema, so the column list (explicit, for safety) and
+        # the copy statement for each attachment slot are built once
+        dest_cur.execute(f"PRAGMA main.table_info('{table}')")
+        col_names = [c[1] for c in dest_cur.fetchall() if c[1] != "id"]  # skip primary-key id
+        col_list = ",".join([f"'{c}'" for c in col_names])
         verb = "IGNORE" if conflict == "ignore" else "REPLACE"
-        dest_cur.execute(f"ATTACH DATABASE '{path}' AS src")
+        insert_sql = [
+            f"INSERT OR {verb} INTO '{table}' ({col_list}) "
+            f"SELECT {','.join(col_names)} FROM src{i}.'{table}'"
+            for i in range(_MAX_ATTACHED)
+        ]
+
+        # Merge all DBs. SQLite refuses to DETACH a database read by an open
+        # transaction, so sources are attached in batches and each batch is
+        # copied in a single transaction
+        for start in range(0, len(db_files), _MAX_ATTACHED):
+            batch = list(enumerate(db_files[start:start + _MAX_ATTACHED]))
+            for i, path in batch:
+                dest_cur.execute(f"ATTACH DATABASE '{path}' AS src{i}")
+            try:
+                # Commit the batch on success. On error it is rolled back, which
+                # only restores an existing destination: a fresh one has no journal
+                # and is deleted below
+                with dest_conn:
+                    dest_cur.execute("BEGIN")
+                    for i, path in batch:
+                        print(f"Merging {path}")
+                        dest_cur.execute(
+                            f"SELECT 1 FROM src{i}.sqlite_master WHERE type='table' AND name=?",
+                            (table,),
+                        )
+                        if dest_cur.fetchone() is None:
+                            print(f"  Skipping {path}: table '{table}' not found")
+                            continue
+                        dest_cur.execute(insert_sql[i])
+            finally:
+                for i, _ in batch:
+                    dest_cur.execute(f"DETACH DATABASE src{i}")
+        merged = True
+
+    finally:
         try:
-            # Explicit column list for safety
-            src_conn = sqlite3.connect(path)
-            src_cur = src_conn.cursor()
-            src_cur.execute(f"PRAGMA table_info('{table}')")
-            cols_info = src_cur.fetchall()
-            src_conn.close()
-            if not cols_info:
-                print(f"  Skipping {path}: table '{table}' not found")
-                dest_cur.execute("DETACH DATABASE src")
-                continue
-
-            col_names = [c[1] for c in cols_info if c[1] != "id"]  # skip primary-key id
-            col_list = ",".join([f"'{c}'" for c in col_names])
-
-            sql = (
-                f"INSERT INTO '{table}' ({col_list}) "
-                f"SELECT {','.join(col_names)} FROM src.'{table}'"
-            )
-            dest_cur.execute("BEGIN")
-            dest_cur.execute(sql)
-            dest_conn.commit()
+            # Restore the indexes even if the merge failed, unless the file goes away
+            if dropped_indexes and (merged or not fresh):
+                with dest_conn:
+                    dest_cur.execute("BEGIN")
+                    for index_sql in dropped_indexes:
+                        dest_cur.execute(index_sql)
         finally:
-            dest_cur.execute("DETACH DATABASE src")
+            dest_conn.close()
+            if fresh and not merged:
+                os.remove(dest_db)
 
-    dest_conn.close()
     print(f"Done. Merged DB written to: {dest_db}")
 
+def merge_sqlite_dbs_parallel(db_files, dest_db, table="runs", conflict="ignore", max_workers=None):
+    """
+    Merge a list of SQLite .db files into a single destination DB, in parallel.
+
+    The files are split in consecutive chunks, each merged by a separate
+    process into a temporary shard next to dest_db; the shards are then
+    merged into dest_db in order, so rows keep the same order as with
+    merge_sqlite_dbs. Few files are merged directly.
+
+    - db_files: list of source .db file paths
+    - dest_db: path to the merged .db file
+    - table: table name to merge (assumes same schema in all DBs)
+    - conflict: 'ignore' or 'replace' for rows violating a constraint (see merge_sqlite_dbs)
+    - max_workers: number of merging processes (default: number of CPUs)
+    """
+    n_chunks = min(max_workers or os.cpu_count() or 1, len(db_files) // _MAX_ATTACHED)
+    if n_chunks < 2:
+        merge_sqlite_dbs(db_files, dest_db, table=table, conflict=conflict)
+        return
+
+    # Every shard gets the schema of the first DB, whichever file its own chunk starts with
+    schema = _table_schema(db_files[0], table)
+    chunk_size = -(-len(db_files) // n_chunks)
+    chunks = [db_files[i:i + chunk_size] for i in range(0, len(db_files), chunk_size)]
+
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(dest_db))) as tmp_dir:
+        shards = [os.path.join(tmp_dir, f"shard_{k}.db") for k in range(len(chunks))]
+        with ProcessPoolExecutor(max_workers=len(chunks)) as ex:
+            list(ex.map(merge_sqlite_dbs, chunks, shards, repeat(table), repeat(conflict), repeat(schema)))
+
+        merge_sqlite_dbs(shards, dest_db, table=table, conflict=conflict)
+
+def _scan_dir(directory):
+    """
+    List one directory, splitting it into .db files and subdirectories.
+
+    os.scandir takes the entry type from the directory listing itself, so no
+    extra stat is needed per entry. As with os.walk, symlinked directories are
+    not followed and unreadable directories are skipped.
+    """
+    db_files = []
+    subdirs = []
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                except OSError:
+                    is_dir = False
+                if is_dir:
+                    subdirs.append(entry.path)
+                elif entry.name.endswith('.db'):
+                    db_files.append(entry.path)
+    except OSError as e:
+        print(f"  Skipping {directory}: {e}")
+    return db_files, subdirs
+
+def _list_db_files(directory):
+    """
+    Recursively list the .db files below a directory, in os.walk order.
+    """
+    db_files, subdirs = _scan_dir(directory)
+    for subdir in subdirs:
+        db_files.extend(_list_db_files(subdir))
+    return db_files
+
+def find_db_files(inputDir, max_workers=16):
+    """
+    Collect all .db files below inputDir.
+
+    The top-level subdirectories are scanned concurrently, which hides the
+    per-directory round-trip latency of network filesystems.
+
+    - inputDir: directory to search
+    - max_workers: number of threads scanning subdirectories
+    """
+    db_files, subdirs = _scan_dir(inputDir)
+    with ThreadPoolExecutor(max_workers=max_workers) as ex:
+        for found in ex.map(_list_db_files, subdirs):
+            db_files.extend(found)
+    return db_files
+
 if __name__ == "__main__":
 
     # inputDir = '/exp/icarus/app/users/msotgia/analysis/twoDRecoStudies/hitTuning/dbs/resultsNewMetricFeb26th'
@@ -86,14 +232,6 @@ if __name__ == "__main__":
     inputDir = '/exp/icarus/data/users/msotgia/hitTuning/resultsToMerge/FluxSim'
     dest_db = '/exp/icarus/data/users/msotgia/hitTuning/resultsToMerge/hitTuning_merged_resultsNewMetricMar22ndFlux.db'
 
-    db_files = []
-    counter = 0
-    for dirpath, dirnames, filenames in os.walk(inputDir):
-        for filename in filenames:
-            #if counter > 10: break
-            if filename.endswith('.db'):
-                fullPath = os.path.join(dirpath, filename)
-                db_files.append(fullPath)
-                counter += 1
-
-    merge_sqlite_dbs(db_files, dest_db, table="runs", conflict="ignore")
+    db_files = find_db_files(inputDir)
+
+    merge_sqlite_dbs_parallel(db_files, dest_db, table="runs", conflict="ignore")